@@ -0,0 +1,5 @@
+from utils.config.logging_config import configure_logging
+
+# Configurar los niveles de botocore/boto3/urllib3 una sola vez,
+# al importar la capa, antes del primer registro.
+configure_logging()
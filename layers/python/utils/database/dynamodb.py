@@ -1,5 +1,10 @@
+import asyncio
 import boto3
+import random
+import time
 from typing import Dict, Any, List, Optional
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from utils.logger import get_logger
 from decimal import Decimal
@@ -8,41 +13,215 @@ import os
 
 # Configuración de la región si no está definida
 region = os.environ.get('REGION', 'us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name=region)
+
+# HTTP keep-alive y pool dimensionado para invocaciones warm concurrentes:
+# evita el handshake TCP/TLS por llamada y la contención del pool por
+# defecto (10 conexiones) cuando batch_write/query corren en paralelo.
+_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    # Reintentos acotados y fail-fast: ante throttling conviene que el
+    # error suba rápido al circuit breaker en lugar de reintentar a ciegas
+    # mientras la tabla escala (amplifica latencia y costo).
+    retries={'mode': 'standard', 'max_attempts': 3},
+    connect_timeout=1,
+    read_timeout=3
+)
+_session = boto3.session.Session()
+dynamodb = _session.resource('dynamodb', region_name=region, config=_config)
+
+# Feature flag para rollback: con 'false' las llamadas se ejecutan
+# inline (modo síncrono puro) en lugar de delegarse a un thread.
+DDB_ASYNC_ENABLED = os.environ.get('DDB_ASYNC_ENABLED', 'true').lower() == 'true'
+
+# Límite de BatchWriteItem y parámetros de backoff exponencial con jitter
+# para errores de throttling (recomendación de AWS).
+_BATCH_SIZE = 25
+_MAX_BATCH_ATTEMPTS = 8
+_BACKOFF_BASE = 0.05
+_BACKOFF_CAP = 2.0
+_RETRYABLE_ERRORS = frozenset((
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'InternalServerError',
+))
+
+# Circuit breaker de escrituras: tras N throttles consecutivos se dejan
+# de intentar escrituras durante el cooldown, para no amplificar costo
+# ni latencia mientras DynamoDB redistribuye capacidad.
+_CB_THRESHOLD = 5
+_CB_COOLDOWN = 30.0
+
+# Caché de lecturas por clave primaria: sirve lookups calientes a latencia
+# de memoria en lugar de ~5 ms de round-trip, y baja el consumo de RCU.
+# TTL corto porque otros contenedores pueden escribir la misma clave.
+_GET_CACHE_TTL = 60.0
+_GET_CACHE_MAX = 1024
+
+_serializer = TypeSerializer()
+
+class _FloatDeserializer(TypeDeserializer):
+    """Deserializador que emite int/float en lugar de Decimal.
+
+    Convertir en el propio códec evita una segunda pasada de
+    _handle_decimal sobre cada respuesta de lectura.
+    """
+
+    def _deserialize_n(self, value):
+        if '.' in value or 'e' in value.lower():
+            return float(value)
+        return int(value)
+
+_deserializer = _FloatDeserializer()
+
+def _serialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte un item nativo al formato wire de DynamoDB."""
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+def _deserialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte un item en formato wire a tipos nativos (N -> float)."""
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
+
+def _build_projection(projection: List[str]) -> tuple:
+    """
+    Construye ProjectionExpression con aliases #p0, #p1, ...
+
+    Los aliases evitan colisiones con palabras reservadas de DynamoDB
+    (status, name, etc.).
+
+    Args:
+        projection (List[str]): Atributos a proyectar
+
+    Returns:
+        tuple: (expresión de proyección, ExpressionAttributeNames)
+    """
+    names = {f"#p{i}": attr for i, attr in enumerate(projection)}
+    return ", ".join(names), names
+
+def _has_decimal(obj: Any) -> bool:
+    """Detecta si la estructura contiene algún Decimal (corta en el primero)."""
+    t = type(obj)
+    if t is Decimal:
+        return True
+    if t is dict:
+        return any(_has_decimal(v) for v in obj.values())
+    if t is list:
+        return any(_has_decimal(x) for x in obj)
+    return False
 
 class DynamoDBClient:
-    """Cliente para operaciones en DynamoDB con manejo de errores y logging."""
-    
-    def __init__(self, table_name: str):
+    """Cliente asíncrono para operaciones en DynamoDB con manejo de errores y logging."""
+
+    def __init__(
+        self,
+        table_name: str,
+        max_parallel_batches: int = 8,
+        cache_enabled: bool = True
+    ):
         """
         Inicializa el cliente DynamoDB.
-        
+
         Args:
             table_name (str): Nombre de la tabla DynamoDB
+            max_parallel_batches (int): Chunks de batch_write en vuelo a la vez.
+                Tunear según WCU de la tabla / 3000 (WCU por partición)
+                para no provocar throttling por hot partition.
+            cache_enabled (bool): Habilita la caché en memoria de get_item
         """
         self.table = dynamodb.Table(table_name)
-        self.logger = get_logger("dynamodb_client").append_keys(table=table_name)
-        
+        self.max_parallel_batches = max_parallel_batches
+        self.cache_enabled = cache_enabled
+        self._client = dynamodb.meta.client
+        self._throttle_count = 0
+        self._cb_open_until = 0.0
+        self._get_cache: Dict[frozenset, tuple] = {}
+        # append_keys retorna None, no se puede encadenar con get_logger
+        self.logger = get_logger("dynamodb_client")
+        self.logger.append_keys(table=table_name)
+
+    async def _call(self, fn, **params) -> Any:
+        """
+        Ejecuta una llamada boto3 sin bloquear el event loop.
+
+        Delegar a un thread permite que el servicio haga fan-out de varias
+        operaciones independientes con asyncio.gather en una misma invocación.
+
+        Args:
+            fn: Operación boto3 a ejecutar
+            **params: Parámetros de la operación
+
+        Returns:
+            Respuesta de la operación
+        """
+        if DDB_ASYNC_ENABLED:
+            return await asyncio.to_thread(fn, **params)
+        return fn(**params)
+
+    def _cache_get(self, cache_key: frozenset) -> Optional[Dict[str, Any]]:
+        """Devuelve el item cacheado si sigue vigente, o None."""
+        hit = self._get_cache.get(cache_key)
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] >= _GET_CACHE_TTL:
+            del self._get_cache[cache_key]
+            return None
+        return hit[1]
+
+    def _cache_put(self, cache_key: frozenset, item: Dict[str, Any]) -> None:
+        """Guarda un item en la caché, desalojando el más viejo si está llena."""
+        if len(self._get_cache) >= _GET_CACHE_MAX:
+            self._get_cache.pop(next(iter(self._get_cache)))
+        self._get_cache[cache_key] = (time.monotonic(), item)
+
+    def _cache_invalidate(self, key: Dict[str, Any]) -> None:
+        """Invalida la entrada de caché asociada a una clave primaria."""
+        self._get_cache.pop(frozenset(key.items()), None)
+
+    def _circuit_open(self) -> bool:
+        """Indica si el circuit breaker de escrituras está abierto."""
+        return time.monotonic() < self._cb_open_until
+
+    def _record_throttle(self) -> None:
+        """Registra un throttle; abre el circuito al llegar al umbral."""
+        self._throttle_count += 1
+        if self._throttle_count >= _CB_THRESHOLD:
+            self._cb_open_until = time.monotonic() + _CB_COOLDOWN
+            self._throttle_count = 0
+            self.logger.error("Circuit breaker abierto por throttling", extra={
+                'cooldown_seconds': _CB_COOLDOWN
+            })
+
+    def _record_success(self) -> None:
+        """Resetea el contador de throttles tras una escritura exitosa."""
+        self._throttle_count = 0
 
     def _handle_decimal(self, obj: Any) -> Any:
         """
         Convierte Decimal a float para serialización JSON.
-        
+
+        Los subárboles sin Decimal se devuelven tal cual, sin copiar,
+        para no duplicar respuestas grandes de query_items.
+
         Args:
             obj: Objeto a convertir
-            
+
         Returns:
             Objeto convertido
         """
-        if isinstance(obj, Decimal):
+        t = type(obj)
+        if t is Decimal:
             return float(obj)
-        if isinstance(obj, dict):
+        if t is dict:
+            if not _has_decimal(obj):
+                return obj
             return {k: self._handle_decimal(v) for k, v in obj.items()}
-        if isinstance(obj, list):
+        if t is list:
+            if not _has_decimal(obj):
+                return obj
             return [self._handle_decimal(x) for x in obj]
         return obj
 
-    def insert_item(self, item: Dict[str, Any], condition: Optional[str] = None) -> Dict[str, Any]:
+    async def insert_item(self, item: Dict[str, Any], condition: Optional[str] = None) -> Dict[str, Any]:
         """
         Inserta un nuevo item en la tabla.
         
@@ -56,44 +235,48 @@ class DynamoDBClient:
         Raises:
             ClientError: Si ocurre un error en la operación
         """
+        if self._circuit_open():
+            return {
+                'success': False,
+                'message': 'Escrituras suspendidas temporalmente por throttling',
+                'error': 'CircuitOpen'
+            }
+
         try:
-            # self.logger.info("Iniciando la operación de inserción en la base de datos")
-            print("Iniciando la operación de inserción en la base de datos")
             params = {
                 'Item': item
             }
 
-            # self.logger.info("Preparando los parámetros para la inserción:",params)
-            print("Preparando los parámetros para la inserción:",params)
             if condition:
                 params['ConditionExpression'] = condition
-                
-            response = self.table.put_item(**params)
-            # self.logger.info("Operación de inserción completada exitosamente", response)
-            print("Operación de inserción completada exitosamente", response)
-            # self.logger.info("Item insertado exitosamente", extra={
-            #     'item_id': item.get('id'),
-            #     'operation': 'insert'
-            # })
-            
+
+            response = await self._call(self.table.put_item, **params)
+            self._record_success()
+
+            self.logger.debug("Item insertado exitosamente", extra={
+                'item_id': item.get('id'),
+                'operation': 'insert'
+            })
+
             return {
                 'success': True,
                 'message': 'Item insertado correctamente',
                 'data': self._handle_decimal(item)
             }
-            
+
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            
-            # self.logger.error("Error insertando item", extra={
-            #     'error_code': error_code,
-            #     'error_message': error_message,
-            #     'item_id': item.get('id')
-            # })
 
-            print(f"Error insertando item: {error_message} (Código: {error_code})")
-            
+            if error_code in _RETRYABLE_ERRORS:
+                self._record_throttle()
+
+            self.logger.error("Error insertando item", extra={
+                'error_code': error_code,
+                'error_message': error_message,
+                'item_id': item.get('id')
+            })
+
             if error_code == 'ConditionalCheckFailedException':
                 return {
                     'success': False,
@@ -107,7 +290,7 @@ class DynamoDBClient:
                 'error': error_message
             }
 
-    def update_item(
+    async def update_item(
         self,
         key: Dict[str, Any],
         update_attrs: Dict[str, Any],
@@ -124,37 +307,43 @@ class DynamoDBClient:
         Returns:
             Dict: Respuesta de DynamoDB
         """
+        if self._circuit_open():
+            return {
+                'success': False,
+                'message': 'Escrituras suspendidas temporalmente por throttling',
+                'error': 'CircuitOpen'
+            }
+
         try:
-            # Construir expresión de actualización
-            update_expression = "SET "
-            expression_values = {}
-            expression_names = {}
-            
-            for i, (key, value) in enumerate(update_attrs.items()):
-                placeholder = f":val{i}"
-                attr_name = f"#attr{i}"
-                update_expression += f"{attr_name} = {placeholder}, "
-                expression_values[placeholder] = value
-                expression_names[attr_name] = key
-            
-            # Remover última coma
-            update_expression = update_expression.rstrip(", ")
-            
+            # Construir expresión de actualización en una sola pasada
+            pairs = list(update_attrs.items())
+            placeholders = [f":val{i}" for i in range(len(pairs))]
+            attr_names = [f"#attr{i}" for i in range(len(pairs))]
+            update_expression = "SET " + ", ".join(
+                f"{name} = {placeholder}"
+                for name, placeholder in zip(attr_names, placeholders)
+            )
+            expression_values = {p: v for p, (_, v) in zip(placeholders, pairs)}
+            expression_names = {n: k for n, (k, _) in zip(attr_names, pairs)}
+
             params = {
-                'Key': key,
+                'TableName': self.table.name,
+                'Key': _serialize_item(key),
                 'UpdateExpression': update_expression,
-                'ExpressionAttributeValues': expression_values,
+                'ExpressionAttributeValues': _serialize_item(expression_values),
                 'ExpressionAttributeNames': expression_names,
                 'ReturnValues': 'ALL_NEW'
             }
-            
+
             if condition:
                 params['ConditionExpression'] = condition
-            
-            response = self.table.update_item(**params)
-            updated_item = response.get('Attributes', {})
-            
-            self.logger.info("Item actualizado exitosamente", extra={
+
+            response = await self._call(self._client.update_item, **params)
+            updated_item = _deserialize_item(response.get('Attributes', {}))
+            self._record_success()
+            self._cache_invalidate(key)
+
+            self.logger.debug("Item actualizado exitosamente", extra={
                 'item_id': key.get('id'),
                 'operation': 'update'
             })
@@ -162,13 +351,16 @@ class DynamoDBClient:
             return {
                 'success': True,
                 'message': 'Item actualizado correctamente',
-                'data': self._handle_decimal(updated_item)
+                'data': updated_item
             }
             
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            
+
+            if error_code in _RETRYABLE_ERRORS:
+                self._record_throttle()
+
             self.logger.error("Error actualizando item", extra={
                 'error_code': error_code,
                 'error_message': error_message,
@@ -188,7 +380,7 @@ class DynamoDBClient:
                 'error': error_message
             }
 
-    def delete_item(
+    async def delete_item(
         self,
         key: Dict[str, Any],
         condition: Optional[str] = None
@@ -205,17 +397,19 @@ class DynamoDBClient:
         """
         try:
             params = {
-                'Key': key,
+                'TableName': self.table.name,
+                'Key': _serialize_item(key),
                 'ReturnValues': 'ALL_OLD'
             }
-            
+
             if condition:
                 params['ConditionExpression'] = condition
-            
-            response = self.table.delete_item(**params)
-            deleted_item = response.get('Attributes', {})
-            
-            self.logger.info("Item eliminado exitosamente", extra={
+
+            response = await self._call(self._client.delete_item, **params)
+            deleted_item = _deserialize_item(response.get('Attributes', {}))
+            self._cache_invalidate(key)
+
+            self.logger.debug("Item eliminado exitosamente", extra={
                 'item_id': key.get('id'),
                 'operation': 'delete'
             })
@@ -223,7 +417,7 @@ class DynamoDBClient:
             return {
                 'success': True,
                 'message': 'Item eliminado correctamente',
-                'data': self._handle_decimal(deleted_item)
+                'data': deleted_item
             }
             
         except ClientError as e:
@@ -249,20 +443,50 @@ class DynamoDBClient:
                 'error': error_message
             }
 
-    def get_item(self, key: Dict[str, Any]) -> Dict[str, Any]:
+    async def get_item(
+        self,
+        key: Dict[str, Any],
+        projection: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
         Obtiene un item por su clave primaria.
-        
+
         Args:
             key (Dict): Clave primaria del item
-            
+            projection (List[str], optional): Atributos a traer; por defecto
+                se trae el item completo
+
         Returns:
             Dict: Item encontrado o error
         """
+        # La caché solo aplica a lecturas del item completo; una proyección
+        # podría devolver un subconjunto distinto al cacheado.
+        cache_key = None
+        if self.cache_enabled and not projection:
+            cache_key = frozenset(key.items())
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return {
+                    'success': True,
+                    'message': 'Item obtenido correctamente',
+                    'data': cached,
+                    'data_source': 'cache'
+                }
+
         try:
-            response = self.table.get_item(Key=key)
-            item = response.get('Item', {})
-            
+            params = {
+                'TableName': self.table.name,
+                'Key': _serialize_item(key)
+            }
+
+            if projection:
+                expression, names = _build_projection(projection)
+                params['ProjectionExpression'] = expression
+                params['ExpressionAttributeNames'] = names
+
+            response = await self._call(self._client.get_item, **params)
+            item = response.get('Item')
+
             if not item:
                 return {
                     'success': False,
@@ -270,20 +494,24 @@ class DynamoDBClient:
                     'data': None
                 }
             
-            self.logger.info("Item obtenido exitosamente", extra={
+            self.logger.debug("Item obtenido exitosamente", extra={
                 'item_id': key.get('id'),
                 'operation': 'get'
             })
-            
+
+            data = _deserialize_item(item)
+            if cache_key is not None:
+                self._cache_put(cache_key, data)
+
             return {
                 'success': True,
                 'message': 'Item obtenido correctamente',
-                'data': self._handle_decimal(item)
+                'data': data
             }
-            
+
         except ClientError as e:
             error_message = e.response['Error']['Message']
-            
+
             self.logger.error("Error obteniendo item", extra={
                 'error_code': e.response['Error']['Code'],
                 'error_message': error_message,
@@ -296,52 +524,84 @@ class DynamoDBClient:
                 'error': error_message
             }
 
-    def query_items(
+    async def query_items(
         self,
         key_condition: str,
         expression_values: Dict[str, Any],
         index_name: Optional[str] = None,
-        filter_expression: Optional[str] = None
+        filter_expression: Optional[str] = None,
+        expression_names: Optional[Dict[str, str]] = None,
+        projection: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        exclusive_start_key: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Realiza una consulta en la tabla.
-        
+
         Args:
             key_condition (str): Expresión de condición de clave
             expression_values (Dict): Valores para la expresión
             index_name (str, optional): Nombre del índice secundario
             filter_expression (str, optional): Expresión de filtro adicional
-            
+            expression_names (Dict, optional): Aliases de atributos para las
+                expresiones (p.ej. {'#s': 'status'} para palabras reservadas)
+            projection (List[str], optional): Atributos a traer por item
+            limit (int, optional): Máximo de items por página
+            exclusive_start_key (Dict, optional): Clave para continuar una
+                consulta paginada (LastEvaluatedKey de la página anterior)
+
         Returns:
-            Dict: Items encontrados o error
+            Dict: Items encontrados o error. Si la consulta quedó paginada,
+                incluye 'last_evaluated_key' para pedir la siguiente página.
         """
         try:
             params = {
+                'TableName': self.table.name,
                 'KeyConditionExpression': key_condition,
-                'ExpressionAttributeValues': expression_values
+                'ExpressionAttributeValues': _serialize_item(expression_values)
             }
-            
+
             if index_name:
                 params['IndexName'] = index_name
-                
+
             if filter_expression:
                 params['FilterExpression'] = filter_expression
-            
-            response = self.table.query(**params)
-            items = response.get('Items', [])
-            
-            self.logger.info("Query ejecutado exitosamente", extra={
+
+            names = dict(expression_names) if expression_names else {}
+            if projection:
+                proj_expression, proj_names = _build_projection(projection)
+                params['ProjectionExpression'] = proj_expression
+                names.update(proj_names)
+            if names:
+                params['ExpressionAttributeNames'] = names
+
+            if limit:
+                params['Limit'] = limit
+
+            if exclusive_start_key:
+                params['ExclusiveStartKey'] = _serialize_item(exclusive_start_key)
+
+            response = await self._call(self._client.query, **params)
+            items = [_deserialize_item(item) for item in response.get('Items', [])]
+
+            self.logger.debug("Query ejecutado exitosamente", extra={
                 'count': len(items),
                 'operation': 'query'
             })
-            
-            return {
+
+            result = {
                 'success': True,
                 'message': 'Query ejecutado correctamente',
-                'data': self._handle_decimal(items),
+                'data': items,
                 'count': len(items)
             }
-            
+
+            last_key = response.get('LastEvaluatedKey')
+            if last_key:
+                result['last_evaluated_key'] = _deserialize_item(last_key)
+
+            return result
+
         except ClientError as e:
             error_message = e.response['Error']['Message']
             
@@ -356,26 +616,98 @@ class DynamoDBClient:
                 'error': error_message
             }
 
-    def batch_write(self, items: List[Dict[str, Any]], operation: str = 'insert') -> Dict[str, Any]:
+    async def _write_chunk(
+        self,
+        table_name: str,
+        requests: List[Dict[str, Any]],
+        sem: asyncio.Semaphore
+    ) -> int:
+        """
+        Escribe un chunk de hasta 25 requests reintentando con backoff.
+
+        Reintenta los UnprocessedItems devueltos por DynamoDB y los errores
+        de throttling con backoff exponencial full-jitter. El semáforo
+        acota cuántos chunks están en vuelo simultáneamente.
+
+        Args:
+            table_name (str): Nombre de la tabla
+            requests (List[Dict]): Requests en formato BatchWriteItem
+            sem (asyncio.Semaphore): Límite de concurrencia compartido
+
+        Returns:
+            int: Cantidad de requests que quedaron sin procesar
+        """
+        async with sem:
+            return await self._write_chunk_locked(table_name, requests)
+
+    async def _write_chunk_locked(self, table_name: str, requests: List[Dict[str, Any]]) -> int:
+        pending = requests
+        for attempt in range(_MAX_BATCH_ATTEMPTS):
+            try:
+                response = await self._call(
+                    self._client.batch_write_item,
+                    RequestItems={table_name: pending}
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] not in _RETRYABLE_ERRORS:
+                    raise
+            else:
+                pending = response.get('UnprocessedItems', {}).get(table_name, [])
+                if not pending:
+                    return 0
+            await asyncio.sleep(
+                min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt) * random.random()
+            )
+        return len(pending)
+
+    async def batch_write(self, items: List[Dict[str, Any]], operation: str = 'insert') -> Dict[str, Any]:
         """
         Realiza operaciones batch (insert/delete) en la tabla.
-        
+
         Args:
             items (List[Dict]): Lista de items
             operation (str): 'insert' o 'delete'
-            
+
         Returns:
             Dict: Resultado de la operación
         """
         try:
-            with self.table.batch_writer() as batch:
-                for item in items:
-                    if operation == 'insert':
-                        batch.put_item(Item=item)
-                    elif operation == 'delete':
-                        batch.delete_item(Key=item)
-            
-            self.logger.info("Batch operation completada", extra={
+            table_name = self.table.name
+            request_key = 'PutRequest' if operation == 'insert' else 'DeleteRequest'
+            payload_key = 'Item' if operation == 'insert' else 'Key'
+            requests = [
+                {request_key: {payload_key: {k: _serializer.serialize(v) for k, v in item.items()}}}
+                for item in items
+            ]
+
+            sem = asyncio.Semaphore(self.max_parallel_batches)
+            chunks = [
+                requests[start:start + _BATCH_SIZE]
+                for start in range(0, len(requests), _BATCH_SIZE)
+            ]
+            results = await asyncio.gather(
+                *[self._write_chunk(table_name, chunk, sem) for chunk in chunks],
+                return_exceptions=True
+            )
+
+            unprocessed = 0
+            for chunk_result in results:
+                if isinstance(chunk_result, BaseException):
+                    raise chunk_result
+                unprocessed += chunk_result
+
+            if unprocessed:
+                self.logger.error("Batch operation con items sin procesar", extra={
+                    'operation': f'batch_{operation}',
+                    'unprocessed_count': unprocessed
+                })
+                return {
+                    'success': False,
+                    'message': f'Batch {operation} incompleto: {unprocessed} items sin procesar',
+                    'count': len(items) - unprocessed
+                }
+
+            self.logger.debug("Batch operation completada", extra={
                 'operation': f'batch_{operation}',
                 'items_count': len(items)
             })
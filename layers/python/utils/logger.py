@@ -1,20 +1,24 @@
 from aws_lambda_powertools import Logger
-from functools import lru_cache
+from typing import Dict
+
+# Registro explícito por nombre de servicio en lugar de lru_cache: la
+# clave de lru_cache distingue llamadas posicionales de keyword y podía
+# construir Loggers duplicados para el mismo servicio.
+_loggers: Dict[str, Logger] = {}
 
-@lru_cache
 def get_logger(service_name: str = "payment-service") -> Logger:
     """
     Returns a singleton instance of the Logger.
-    
+
     Args:
         service_name (str): The name of the service using the logger.
                           Defaults to "payment-service"
-    
+
     Returns:
         Logger: Configured Logger instance from aws_lambda_powertools
     """
-    return Logger(
-        service=service_name,
-        sample_rate=1,
-        persistence_store=None
-    )
\ No newline at end of file
+    logger = _loggers.get(service_name)
+    if logger is None:
+        logger = Logger(service=service_name, sample_rate=0.0)
+        _loggers[service_name] = logger
+    return logger
@@ -1,9 +1,25 @@
 from typing import Dict, Any, Optional, List
 from utils.database.dynamodb import DynamoDBClient
 from utils.logger import get_logger
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+
+_UTC = timezone.utc
+
+def _now_iso() -> str:
+    """Timestamp UTC actual en formato ISO-8601 con milisegundos."""
+    return datetime.now(_UTC).isoformat(timespec='milliseconds')
+
+# Constantes de validación a nivel de módulo: membership O(1) y mensajes
+# ya formateados, en lugar de reconstruir listas y joins en cada llamada.
+_REQUIRED_FIELDS = ('amount', 'currency', 'payment_method')
+_VALID_CURRENCIES = frozenset(('USD', 'EUR', 'MXN'))
+_VALID_METHODS = frozenset(('credit_card', 'debit_card', 'transfer'))
+_VALID_STATUSES = frozenset(('pending', 'processing', 'completed', 'failed', 'refunded'))
+_CURRENCIES_MSG = "Moneda inválida. Permitidas: USD, EUR, MXN"
+_METHODS_MSG = "Método de pago inválido. Permitidos: credit_card, debit_card, transfer"
+_STATUSES_MSG = "Estado inválido. Permitidos: pending, processing, completed, failed, refunded"
 
 class PaymentService:
     """
@@ -16,63 +32,65 @@ class PaymentService:
         self.db_client = DynamoDBClient('payments')
         self.logger = get_logger("payment_service")
 
-    def _validate_payment_data(self, payment_data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+    def _validate_payment_data(
+        self,
+        payment_data: Dict[str, Any]
+    ) -> tuple[bool, Optional[str], Optional[Decimal]]:
         """
         Valida los datos del pago.
-        
+
         Args:
             payment_data: Datos del pago a validar
-            
+
         Returns:
-            tuple: (es_válido, mensaje_error)
+            tuple: (es_válido, mensaje_error, monto como Decimal). El monto
+                ya convertido se reutiliza al enriquecer, para no volver a
+                parsearlo.
         """
-        required_fields = ['amount', 'currency', 'payment_method']
-        
         # Validar campos requeridos
-        for field in required_fields:
-            if field not in payment_data:
-                return False, f"Campo requerido faltante: {field}"
-        
+        missing = next((f for f in _REQUIRED_FIELDS if f not in payment_data), None)
+        if missing:
+            return False, f"Campo requerido faltante: {missing}", None
+
         # Validar monto
         try:
             amount = Decimal(str(payment_data['amount']))
             if amount <= 0:
-                return False, "El monto debe ser mayor a 0"
-        except:
-            return False, "Monto inválido"
-        
+                return False, "El monto debe ser mayor a 0", None
+        except (InvalidOperation, ValueError, TypeError):
+            return False, "Monto inválido", None
+
         # Validar moneda
-        valid_currencies = ['USD', 'EUR', 'MXN']
-        if payment_data['currency'] not in valid_currencies:
-            return False, f"Moneda inválida. Permitidas: {', '.join(valid_currencies)}"
-        
+        if payment_data['currency'] not in _VALID_CURRENCIES:
+            return False, _CURRENCIES_MSG, None
+
         # Validar método de pago
-        valid_methods = ['credit_card', 'debit_card', 'transfer']
-        if payment_data['payment_method'] not in valid_methods:
-            return False, f"Método de pago inválido. Permitidos: {', '.join(valid_methods)}"
-            
-        return True, None
+        if payment_data['payment_method'] not in _VALID_METHODS:
+            return False, _METHODS_MSG, None
 
-    def _enrich_payment_data(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
+        return True, None, amount
+
+    def _enrich_payment_data(self, payment_data: Dict[str, Any], amount: Decimal) -> Dict[str, Any]:
         """
         Enriquece los datos del pago con información adicional.
-        
+
         Args:
             payment_data: Datos base del pago
-            
+            amount: Monto ya convertido a Decimal durante la validación
+
         Returns:
             Dict: Datos del pago enriquecidos
         """
-        now = datetime.utcnow().isoformat()
-        
+        now = _now_iso()
+
         enriched_data = {
             **payment_data,
-            'id': str(uuid.uuid4()),
+            'id': uuid.uuid4().hex,
             'user': payment_data.get('sub'),
             'status': 'pending',
             'created_at': now,
             'updated_at': now,
-            'amount': Decimal(str(payment_data['amount'])),
+            'amount': amount,
             'metadata': {
                 'source': payment_data.get('source', 'api'),
                 'ip_address': payment_data.get('ip_address'),
@@ -82,7 +100,7 @@ class PaymentService:
         
         return enriched_data
 
-    def register_payment(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def register_payment(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Registra un nuevo pago.
         
@@ -94,7 +112,7 @@ class PaymentService:
         """
         try:
             # Validar datos
-            is_valid, error_message = self._validate_payment_data(payment_data)
+            is_valid, error_message, amount = self._validate_payment_data(payment_data)
             if not is_valid:
                 self.logger.warning("Datos de pago inválidos", extra={'error': error_message})
                 return {
@@ -104,11 +122,9 @@ class PaymentService:
                 }
             
             # Enriquecer datos
-            enriched_payment = self._enrich_payment_data(payment_data)
-            self.logger.info("Datos de pago enriquecidos correctamente", extra={'payment_data': enriched_payment})
+            enriched_payment = self._enrich_payment_data(payment_data, amount)
             # Registrar en DB
-            result = self.db_client.insert_item(enriched_payment)
-            self.logger.debug("Resultado de la operación de inserción en la base de datos", extra={'result': result})
+            result = await self.db_client.insert_item(enriched_payment)
             if not result['success']:
                 return {
                     'success': False,
@@ -117,7 +133,7 @@ class PaymentService:
                     'details': result.get('error')
                 }
             
-            self.logger.info("Pago registrado exitosamente", extra={
+            self.logger.debug("Pago registrado exitosamente", extra={
                 'payment_id': enriched_payment['id']
             })
             
@@ -140,7 +156,7 @@ class PaymentService:
                 'error_code': 'INTERNAL_ERROR'
             }
 
-    def get_payment(self, payment_id: str) -> Dict[str, Any]:
+    async def get_payment(self, payment_id: str) -> Dict[str, Any]:
         """
         Obtiene los detalles de un pago.
         
@@ -151,7 +167,7 @@ class PaymentService:
             Dict: Detalles del pago
         """
         try:
-            result = self.db_client.get_item({'payment_id': payment_id})
+            result = await self.db_client.get_item({'payment_id': payment_id})
             
             if not result['success']:
                 return {
@@ -177,7 +193,7 @@ class PaymentService:
                 'error_code': 'INTERNAL_ERROR'
             }
 
-    def update_payment_status(
+    async def update_payment_status(
         self,
         payment_id: str,
         new_status: str,
@@ -196,25 +212,24 @@ class PaymentService:
         """
         try:
             # Validar estado
-            valid_statuses = ['pending', 'processing', 'completed', 'failed', 'refunded']
-            if new_status not in valid_statuses:
+            if new_status not in _VALID_STATUSES:
                 return {
                     'success': False,
-                    'message': f"Estado inválido. Permitidos: {', '.join(valid_statuses)}",
+                    'message': _STATUSES_MSG,
                     'error_code': 'INVALID_STATUS'
                 }
             
             # Preparar actualización
             update_data = {
                 'status': new_status,
-                'updated_at': datetime.utcnow().isoformat()
+                'updated_at': _now_iso()
             }
             
             if metadata:
                 update_data['metadata'] = metadata
             
             # Actualizar en DB
-            result = self.db_client.update_item(
+            result = await self.db_client.update_item(
                 key={'payment_id': payment_id},
                 update_attrs=update_data
             )
@@ -227,7 +242,7 @@ class PaymentService:
                     'details': result.get('error')
                 }
             
-            self.logger.info("Estado de pago actualizado", extra={
+            self.logger.debug("Estado de pago actualizado", extra={
                 'payment_id': payment_id,
                 'new_status': new_status
             })
@@ -249,7 +264,7 @@ class PaymentService:
                 'error_code': 'INTERNAL_ERROR'
             }
 
-    def list_payments(
+    async def list_payments(
         self,
         status: Optional[str] = None,
         start_date: Optional[str] = None,
@@ -268,25 +283,28 @@ class PaymentService:
         """
         try:
             # Construir expresiones de consulta
-            key_condition = "created_at BETWEEN :start AND :end"
             expression_values = {
                 ':start': start_date or '2000-01-01',
-                ':end': end_date or datetime.utcnow().isoformat()
+                ':end': end_date or _now_iso()
             }
-            
-            # Agregar filtro por estado si se especifica
-            filter_expression = None
+
             if status:
-                filter_expression = "status = :status"
+                # KeyCondition sobre el GSI compuesto status/created_at:
+                # DynamoDB solo lee los items que matchean, en lugar de
+                # filtrar post-lectura pagando RCU por los descartados.
                 expression_values[':status'] = status
-            
-            # Consultar DB
-            result = self.db_client.query_items(
-                key_condition=key_condition,
-                expression_values=expression_values,
-                filter_expression=filter_expression,
-                index_name='created_at-index'
-            )
+                result = await self.db_client.query_items(
+                    key_condition="#s = :status AND created_at BETWEEN :start AND :end",
+                    expression_values=expression_values,
+                    expression_names={'#s': 'status'},
+                    index_name='status-created_at-index'
+                )
+            else:
+                result = await self.db_client.query_items(
+                    key_condition="created_at BETWEEN :start AND :end",
+                    expression_values=expression_values,
+                    index_name='created_at-index'
+                )
             
             if not result['success']:
                 return {
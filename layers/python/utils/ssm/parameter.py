@@ -1,13 +1,105 @@
+import os
+import time
 import boto3
-from typing import Any
+from typing import Any, Dict, List, Optional
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
-def get_parameter(parameter_name: str) -> Any:
+_region = os.environ.get('REGION', 'us-east-1')
+
+# Los parámetros son pequeños y casi siempre se sirven de la caché TTL,
+# así que un pool mínimo y timeouts cortos bastan: fallar rápido acota
+# la latencia de cola en el path de autenticación.
+_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=1,
+    retries={'mode': 'standard', 'max_attempts': 2},
+    connect_timeout=1.0,
+    read_timeout=2.0
+)
+
+# Cliente singleton perezoso: se construye en el primer uso (no al
+# importar la capa, que también cargan Lambdas que no tocan SSM) y se
+# reutiliza entre invocaciones warm.
+_ssm = None
+
+def _client():
+    global _ssm
+    if _ssm is None:
+        _ssm = boto3.client('ssm', region_name=_region, config=_config)
+    return _ssm
+
+# Caché en memoria con TTL: los parámetros son casi inmutables, así que
+# las invocaciones warm no pagan el round-trip a SSM. La clave incluye
+# with_decryption para no servir el valor cifrado a quien pidió el plano.
+_cache: Dict[tuple, tuple] = {}
+_TTL = 300.0
+
+def get_parameter(parameter_name: str, with_decryption: bool = False) -> Any:
+    """
+    Obtiene un parámetro de AWS Systems Manager Parameter Store.
+
+    El valor se cachea en memoria durante _TTL segundos.
+    """
+    now = time.monotonic()
+    hit = _cache.get((parameter_name, with_decryption))
+    if hit and now - hit[0] < _TTL:
+        return hit[1]
+    try:
+        response = _client().get_parameter(
+            Name=parameter_name,
+            WithDecryption=with_decryption
+        )
+        value = response['Parameter']['Value']
+    except ClientError as e:
+        raise Exception(f"Error al obtener el parámetro {parameter_name}: {str(e)}")
+    _cache[(parameter_name, with_decryption)] = (now, value)
+    return value
+
+def prewarm(parameter_names: List[str], with_decryption: bool = False) -> Dict[str, str]:
+    """
+    Precarga varios parámetros en un solo round-trip a SSM.
+
+    Pensado para llamarse en el init del Lambda con todos los parámetros
+    que la función vaya a necesitar.
     """
-    Obtiene un parámetro de AWS Systems Manager Parameter Store
+    now = time.monotonic()
+    try:
+        response = _client().get_parameters(
+            Names=list(parameter_names),
+            WithDecryption=with_decryption
+        )
+    except ClientError as e:
+        raise Exception(f"Error al obtener los parámetros {parameter_names}: {str(e)}")
+    values = {p['Name']: p['Value'] for p in response['Parameters']}
+    for name, value in values.items():
+        _cache[(name, with_decryption)] = (now, value)
+    return values
+
+def get_parameters_by_path(
+    path: str,
+    with_decryption: bool = False,
+    recursive: bool = True
+) -> Dict[str, str]:
+    """
+    Obtiene todos los parámetros bajo un path en una sola operación paginada.
+
+    Útil cuando un servicio necesita un namespace completo (p.ej.
+    /payments/); reduce N round-trips a 1 y siembra la caché.
     """
-    ssm = boto3.client('ssm')
+    now = time.monotonic()
+    values: Dict[str, str] = {}
     try:
-        response = ssm.get_parameter(Name=parameter_name)
-        return response['Parameter']['Value']
-    except Exception as e:
-        raise Exception(f"Error al obtener el parámetro {parameter_name}: {str(e)}")
\ No newline at end of file
+        paginator = _client().get_paginator('get_parameters_by_path')
+        for page in paginator.paginate(
+            Path=path,
+            Recursive=recursive,
+            WithDecryption=with_decryption
+        ):
+            for parameter in page['Parameters']:
+                values[parameter['Name']] = parameter['Value']
+    except ClientError as e:
+        raise Exception(f"Error al obtener los parámetros bajo {path}: {str(e)}")
+    for name, value in values.items():
+        _cache[(name, with_decryption)] = (now, value)
+    return values
@@ -1,16 +1,22 @@
-import json
-from datetime import datetime
-import pytz
+import orjson
+from datetime import datetime, timezone
+
+def _dumps(obj):
+    # Serialización en C: ~5-10x más rápida que json.dumps
+    return orjson.dumps(obj).decode()
+
+# UTC es stateless: el singleton de stdlib evita el parse de zoneinfo de
+# pytz en cada invocación y quita pytz del paquete (menos cold start).
+_UTC = timezone.utc
 
 def lambda_handler(event, context):
     # Get current time in UTC
-    tz = pytz.timezone('UTC')
-    current_time = datetime.now(tz).strftime('%Y-%m-%d %H:%M:%S %Z')
-    
+    current_time = datetime.now(_UTC).strftime('%Y-%m-%d %H:%M:%S UTC')
+
     return {
         'statusCode': 200,
-        'body': json.dumps({
+        'body': _dumps({
             'message': 'Hello World!',
             'timestamp': current_time
         })
-    }
\ No newline at end of file
+    }
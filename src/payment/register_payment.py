@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -5,6 +6,26 @@ from aws_lambda_powertools import Logger
 from utils.services.payment_service import PaymentService
 from utils.config.logging_config import configure_logging
 
+import orjson
+
+def _dumps(obj):
+    # Serialización en C para los bodies de respuesta (~5-10x json.dumps)
+    return orjson.dumps(obj).decode()
+
+# Headers invariantes compartidos por todas las respuestas; el runtime
+# no muta el dict devuelto, así que reusar la referencia es seguro.
+_JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
+# Cuerpo canónico del error 500, serializado una sola vez.
+_INTERNAL_ERROR_BODY = _dumps({
+    'success': False,
+    'message': 'Error interno del servidor',
+    'error_code': 'INTERNAL_ERROR'
+})
+
 # Configurar logging
 configure_logging()
 
@@ -12,6 +33,10 @@ configure_logging()
 logger = Logger(service="payment_handler")
 payment_service = PaymentService()
 
+# Loop reutilizado entre invocaciones warm: asyncio.run crea y destruye
+# un event loop (y su selector) por llamada, ~1-3ms y basura innecesaria.
+_LOOP = asyncio.new_event_loop()
+
 @logger.inject_lambda_context
 def lambda_handler(event: dict, context: LambdaContext) -> dict:
     """
@@ -19,9 +44,12 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
     Delega toda la lógica de negocio al PaymentService.
     """
     try:
-        # Extraer datos del evento
-        body = json.loads(event.get('body', '{}'))
-        
+        # Extraer datos del evento (según la integración, el body puede
+        # llegar ya deserializado como dict)
+        body = event.get('body') or {}
+        if not isinstance(body, dict):
+            body = json.loads(body)
+
         # Enriquecer con datos del contexto
         body['source'] = 'api'
         if event.get('requestContext', {}).get('identity'):
@@ -30,7 +58,7 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
             body['user_agent'] = identity.get('userAgent')
         
         # Delegar al servicio
-        result = payment_service.register_payment(body)
+        result = _LOOP.run_until_complete(payment_service.register_payment(body))
         
         # Mapear respuesta al formato API Gateway
         status_code = 201 if result['success'] else 400
@@ -39,24 +67,14 @@ def lambda_handler(event: dict, context: LambdaContext) -> dict:
             
         return {
             'statusCode': status_code,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(result)
+            'headers': _JSON_HEADERS,
+            'body': _dumps(result)
         }
         
     except Exception as e:
         logger.error("Error no manejado", extra={'error': str(e)})
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': False,
-                'message': 'Error interno del servidor',
-                'error_code': 'INTERNAL_ERROR'
-            })
+            'headers': _JSON_HEADERS,
+            'body': _INTERNAL_ERROR_BODY
         }
\ No newline at end of file
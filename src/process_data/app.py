@@ -1,33 +1,37 @@
-import json
-import pandas as pd
-import numpy as np
+import random
+import statistics
+
+import orjson
+
+def _dumps(obj):
+    # Serialización en C: ~5-10x más rápida que json.dumps y maneja
+    # datetime/UUID sin callback default=
+    return orjson.dumps(obj).decode()
 
 def lambda_handler(event, context):
     try:
-        # Ejemplo de procesamiento de datos con pandas
-        data = {
-            'numbers': np.random.randn(5).tolist()
-        }
-        
-        df = pd.DataFrame(data)
+        # Estadísticas sobre 5 números: stdlib basta, sin pagar el import
+        # de pandas/numpy (~800ms de cold start) ni construir un DataFrame.
+        nums = [random.gauss(0, 1) for _ in range(5)]
+
         stats = {
-            'mean': df['numbers'].mean(),
-            'std': df['numbers'].std(),
-            'min': df['numbers'].min(),
-            'max': df['numbers'].max()
+            'mean': statistics.fmean(nums),
+            'std': statistics.stdev(nums),
+            'min': min(nums),
+            'max': max(nums)
         }
-        
+
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': _dumps({
                 'message': 'Data processed successfully',
                 'statistics': stats
-            }, default=str)
+            })
         }
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'error': str(e)
             })
-        }
\ No newline at end of file
+        }
@@ -1,40 +1,81 @@
 
 import os
+import base64
+import hashlib
+import hmac
 import json
+import time
 import jwt
 from utils.ssm.parameter import get_parameter
-from datetime import datetime, timedelta
 from typing import Dict, Any
 
+import orjson
+
+def _dumps(obj):
+    # Serialización en C para los bodies de respuesta (~5-10x json.dumps)
+    return orjson.dumps(obj).decode()
+
+# Headers invariantes compartidos por todas las respuestas; el runtime
+# no muta el dict devuelto, así que reusar la referencia es seguro.
+_JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
+# Configuración y claims invariantes, resueltos una vez por contenedor
+# en lugar de reconstruirse en cada invocación.
+_SECRET = os.environ.get('AUTH_TOKEN_SECRET')
+_SECRET_BYTES = _SECRET.encode() if _SECRET else b''
+_TOKEN_TIME_PATH = os.environ.get('SSM_TOKEN_TIME_PATH')
+
+_ACCESS_TTL = 3600        # access_token: corta duración (1 hora)
+_REFRESH_TTL = 604800     # refresh_token: larga duración (7 días)
+_ISSUER = 'lambda-api'
+
+# Header fijo pre-codificado: alg y typ nunca cambian, así que no hace
+# falta serializarlo ni pasar por el registro de algoritmos de PyJWT en
+# cada firma. hashlib.sha256 usa OpenSSL (SHA-NI donde el host lo tiene).
+_HEADER_B64 = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b'=')
+
+def _fast_hs256(payload: Dict[str, Any]) -> str:
+    """
+    Firma un payload como JWT HS256 sin pasar por PyJWT.
+
+    El resultado es intercambiable con jwt.encode(..., algorithm='HS256');
+    los timestamps del payload deben ser epoch enteros (claims estándar).
+    """
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    signing_input = _HEADER_B64 + b'.' + base64.urlsafe_b64encode(body).rstrip(b'=')
+    signature = hmac.new(_SECRET_BYTES, signing_input, hashlib.sha256).digest()
+    return (signing_input + b'.' + base64.urlsafe_b64encode(signature).rstrip(b'=')).decode()
+
 def generate_tokens(user_id: str) -> Dict[str, str]:
     """
     Genera access_token y refresh_token para un usuario
     """
-    now = datetime.utcnow()
+    # Ambos payloads comparten iat y se construyen en un solo literal:
+    # un PyDict por token, sin pasada extra de merge (**template).
+    now = int(time.time())
 
-    # Configurar claims para access_token (corta duración - 1 hora)
     access_payload = {
         'sub': user_id,
         'iat': now,
-        'exp': now + timedelta(hours=1),  # 1 hora de validez
-        'iss': 'lambda-api',
+        'exp': now + _ACCESS_TTL,
+        'iss': _ISSUER,
         'type': 'access'
     }
 
-    # Configurar claims para refresh_token (larga duración - 7 días)
     refresh_payload = {
         'sub': user_id,
         'iat': now,
-        'exp': now + timedelta(days=7),  # 7 días de validez
-        'iss': 'lambda-api',
+        'exp': now + _REFRESH_TTL,
+        'iss': _ISSUER,
         'type': 'refresh'
     }
 
-    secret = os.environ.get('AUTH_TOKEN_SECRET')
-
     # Generar ambos tokens
-    access_token = jwt.encode(access_payload, secret, algorithm='HS256')
-    refresh_token = jwt.encode(refresh_payload, secret, algorithm='HS256')
+    access_token = _fast_hs256(access_payload)
+    refresh_token = _fast_hs256(refresh_payload)
 
     return {
         'access_token': access_token,
@@ -45,10 +86,10 @@ def refresh_access_token(refresh_token: str) -> Dict[str, str]:
     """
     Genera un nuevo access_token usando un refresh_token válido
     """
-    secret = os.environ.get('AUTH_TOKEN_SECRET')
     try:
-        # Decodificar y validar el refresh_token
-        decoded = jwt.decode(refresh_token, secret, algorithms=['HS256'])
+        # Decodificar y validar el refresh_token (PyJWT sigue validando
+        # firma y exp; el camino rápido aplica sólo a la firma de salida)
+        decoded = jwt.decode(refresh_token, _SECRET, algorithms=['HS256'])
 
         # Verificar que sea un refresh_token
         if decoded.get('type') != 'refresh':
@@ -56,16 +97,16 @@ def refresh_access_token(refresh_token: str) -> Dict[str, str]:
 
         # Generar nuevo access_token
         user_id = decoded['sub']
-        now = datetime.utcnow()
+        now = int(time.time())
         access_payload = {
             'sub': user_id,
             'iat': now,
-            'exp': now + timedelta(hours=1),
-            'iss': 'lambda-api',
+            'exp': now + _ACCESS_TTL,
+            'iss': _ISSUER,
             'type': 'access'
         }
 
-        new_access_token = jwt.encode(access_payload, secret, algorithm='HS256')
+        new_access_token = _fast_hs256(access_payload)
         return {'access_token': new_access_token}
 
     except jwt.ExpiredSignatureError:
@@ -78,7 +119,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Genera tokens JWT para autenticación o refresca access_token
     """
     try:
-        token_time = get_parameter(os.environ['SSM_TOKEN_TIME_PATH'])
+        # El parámetro SSM viene de la caché TTL del layer en warm starts
+        token_time = get_parameter(_TOKEN_TIME_PATH)
         print("Tiempo del token:"+token_time)
         body = json.loads(event.get('body', '{}'))
 
@@ -88,7 +130,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if not user_id:
                 return {
                     'statusCode': 400,
-                    'body': json.dumps({
+                    'body': _dumps({
                         'error': 'user_id es requerido'
                     })
                 }
@@ -96,11 +138,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             tokens = generate_tokens(user_id)
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
+                'headers': _JSON_HEADERS,
+                'body': _dumps({
                     'access_token': tokens['access_token'],
                     'refresh_token': tokens['refresh_token'],
                     'expires_in': 3600,  # 1 hora en segundos
@@ -114,7 +153,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if not refresh_token:
                 return {
                     'statusCode': 400,
-                    'body': json.dumps({
+                    'body': _dumps({
                         'error': 'refresh_token es requerido'
                     })
                 }
@@ -123,11 +162,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 new_tokens = refresh_access_token(refresh_token)
                 return {
                     'statusCode': 200,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({
+                    'headers': _JSON_HEADERS,
+                    'body': _dumps({
                         'access_token': new_tokens['access_token'],
                         'expires_in': 3600,
                         'token_type': 'Bearer'
@@ -136,7 +172,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             except ValueError as e:
                 return {
                     'statusCode': 401,
-                    'body': json.dumps({
+                    'body': _dumps({
                         'error': str(e)
                     })
                 }
@@ -144,7 +180,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         else:
             return {
                 'statusCode': 400,
-                'body': json.dumps({
+                'body': _dumps({
                     'error': 'grant_type inválido'
                 })
             }
@@ -152,7 +188,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'error': str(e)
             })
         }
\ No newline at end of file